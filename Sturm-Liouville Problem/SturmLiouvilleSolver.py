@@ -1,12 +1,62 @@
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
 import numpy as np
-from scipy.integrate import solve_ivp
+from scipy.integrate import ode, simpson
 import matplotlib
 import matplotlib.pyplot as plt
 
 matplotlib.use('TkAgg')
 
+try:
+    from numba import njit
+except ImportError:
+    # without numba the right-hand side runs as plain python
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+
+@njit(cache=True)
+def _sl_rhs(x, u, du, lambda_val, m):
+    """
+    right-hand side of the first-order system as a compiled function of plain floats,
+    the shooting integration calls it directly and equation_system wraps it
+    """
+    cos_x = np.cos(x)
+    sin_x = np.sin(x)
+    cos_2x = np.cos(2 * x)
+
+    if abs(sin_x) < 1e-10:
+        sin_x = 1e-10
+
+    # calculating second derivative coefficient
+    p = -0.5 * cos_x ** 4
+
+    # first derivative coefficient
+    q = -0.5 * (cos_x ** 3 * cos_2x / sin_x)
+
+    # calculating function coefficient
+    r = (m ** 2 * cos_x ** 2) / (2 * sin_x ** 2) - cos_x / sin_x
+
+    return du, (-q * du - (r - lambda_val) * u) / p
+
+
+def _find_eigenpair(solver, lambda_guess, search_width):
+    """
+    finding one eigenvalue and its unnormalized eigenfunction,
+    module level so it can run in a worker process on a copy of the solver
+    """
+    lambda_val = solver.find_eigenvalue(lambda_guess, search_width=search_width)
+    u, _ = solver.solve_ivp_with_shooting(lambda_val)
+    return lambda_val, u
+
 
 class SturmLiouvilleSolver:
+    # most shooting results kept, the least recently used is dropped first
+    shooting_cache_size = 256
+
     def __init__(self, x_start=0.0001, x_end=np.pi / 2 - 0.0001, num_points=1000):
         """
         Initializing the solver with domain parameters
@@ -17,9 +67,20 @@ class SturmLiouvilleSolver:
         self.num_points = num_points
         self.x = np.linspace(x_start, x_end, num_points)
         self.m = 1
+        # shooting results keyed on (λ rounded to 12 decimals, initial slope)
+        self._shooting_cache = OrderedDict()
+        # one integrator reused by every shot, its right-hand side reads the current λ
+        self._integrator = None
+        self._lambda_val = None
         print(f"Initialized solver with domain [{x_start:.6f}, {x_end:.6f}] using {num_points} points")
 
 
+    def __getstate__(self):
+        # the Fortran integrator can't be pickled for the worker processes, it's recreated there
+        state = self.__dict__.copy()
+        state['_integrator'] = None
+        return state
+
     def equation_system(self, x, y, lambda_val):
         """
         converting second-order ODE to a system of first-order ODEs.
@@ -28,48 +89,52 @@ class SturmLiouvilleSolver:
         """
         u, du = y
 
-        cos_x = np.cos(x)
-        sin_x = np.sin(x)
-        cos_2x = np.cos(2 * x)
-
-        if abs(sin_x) < 1e-10:
-            sin_x = 1e-10
-
-        # calculating second derivative coefficient
-        p = -0.5 * cos_x ** 4
-
-        # first derivative coefficient
-        q = -0.5 * (cos_x ** 3 * cos_2x / sin_x)
-
-        # calculating function coefficient
-        r = (self.m ** 2 * cos_x ** 2) / (2 * sin_x ** 2) - cos_x / sin_x
-
         # system of first-order ODEs
-        return [
-            du,
-            (-q * du - (r - lambda_val) * u) / p
-        ]
+        return list(_sl_rhs(x, u, du, lambda_val, self.m))
 
     def solve_ivp_with_shooting(self, lambda_val, initial_slope=1.0):
+        # reusing the integration if this λ was already shot
+        key = (round(lambda_val, 12), initial_slope)
+        if key in self._shooting_cache:
+            self._shooting_cache.move_to_end(key)
+            return self._shooting_cache[key]
+
         # initial conditions are: u(0) = 0, u'(0) = slope
         y0 = [0, initial_slope]
 
-        solution = solve_ivp(
-            fun=lambda x, y: self.equation_system(x, y, lambda_val),
-            t_span=(self.x_start, self.x_end),
-            y0=y0,
-            method='RK45',
-            t_eval=self.x
-        )
-
-        return solution.y[0], solution.y[1]  # Return u and du/dx
-
-    def find_eigenvalue(self, lambda_guess, tolerance=1e-6, max_iterations=100):
-        # using shooting method with binary search
+        # Fortran Dormand-Prince, the same scheme as RK45,
+        # stepping straight to the grid points without the solve_ivp machinery.
+        # u(π/2) is only ~1e-4 between eigenvalues, solve_ivp's default rtol=1e-3
+        # gets its sign wrong, these tolerances keep it within ~1% of the exact value
+        if self._integrator is None:
+            self._integrator = ode(lambda x, y: _sl_rhs(x, y[0], y[1], self._lambda_val, self.m))
+            self._integrator.set_integrator('dopri5', rtol=1e-6, atol=1e-9, nsteps=10 ** 6)
+
+        # only λ changes between shots, the integrator is restarted from the initial conditions
+        self._lambda_val = lambda_val
+        solver = self._integrator
+        solver.set_initial_value(y0, self.x_start)
+
+        solution = np.empty((self.num_points, 2))
+        solution[0] = y0
+        for i in range(1, self.num_points):
+            solution[i] = solver.integrate(self.x[i])
+            if not solver.successful():
+                raise ValueError(f"Integration failed for lambda = {lambda_val} at x = {solver.t:.6f}")
+
+        self._shooting_cache[key] = solution[:, 0], solution[:, 1]
+        if len(self._shooting_cache) > self.shooting_cache_size:
+            self._shooting_cache.popitem(last=False)
+        return self._shooting_cache[key]  # Return u and du/dx
+
+    def find_eigenvalue(self, lambda_guess, tolerance=1e-6, max_iterations=100, search_width=5):
+        # using shooting method with binary search on [guess - width, guess + width]
 
         print(f"\nSearching for eigenvalue near λ = {lambda_guess:.6f}")
-        lambda_left = lambda_guess - 5
-        lambda_right = lambda_guess + 5
+        # only the last search is kept, its result is fetched again for the eigenfunction
+        self._shooting_cache.clear()
+        lambda_left = lambda_guess - search_width
+        lambda_right = lambda_guess + search_width
         iteration = 0
 
         for iteration in range(max_iterations):
@@ -99,31 +164,34 @@ class SturmLiouvilleSolver:
         eigenvalues = []
         eigenfunctions = []
 
-        # inital guess for the first eigenvalue
-        lambda_guess = 1.0
-
-        for i in range(num_eigenvalues):
-            print(f"\nSearching for eigenvalue {i + 1}/{num_eigenvalues}")
-
-            # finding eigenvalue
-            lambda_val = self.find_eigenvalue(lambda_guess)
+        # disjoint search intervals [1, 6], [6, 11], ... so every search is independent,
+        # bisection only evaluates interior points, so the eigenvalues come out distinct and increasing
+        search_width = 2.5
+        lambda_guesses = [1.0 + search_width + 2 * search_width * i for i in range(num_eigenvalues)]
+        print("Search intervals: " + ", ".join(f"[{guess - search_width:.1f}, {guess + search_width:.1f}]"
+                                               for guess in lambda_guesses))
+
+        # each process computes one eigenpair, the output of the searches interleaves
+        workers = min(num_eigenvalues, os.cpu_count() or 1)
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                eigenpairs = list(executor.map(_find_eigenpair, repeat(self), lambda_guesses, repeat(search_width)))
+        else:
+            # a single core gains nothing from worker processes
+            eigenpairs = list(map(_find_eigenpair, repeat(self), lambda_guesses, repeat(search_width)))
+
+        for i, (lambda_val, u) in enumerate(eigenpairs):
             eigenvalues.append(lambda_val)
 
-            # finding corresponding eigenfunction
-            print(f"Computing eigenfunction for λ_{i + 1} = {lambda_val:.6f}")
-            u, _ = self.solve_ivp_with_shooting(lambda_val)
-
             # normalizing eigenfunction
-            norm = np.sqrt(np.trapezoid(u ** 2, self.x))
+            print(f"Computing eigenfunction for λ_{i + 1} = {lambda_val:.6f}")
+            # Simpson's rule, scipy corrects the last of the 999 intervals
+            norm = np.sqrt(simpson(u ** 2, x=self.x))
             u = u / norm
             print(f"Normalized eigenfunction with norm factor: {norm:.6f}")
 
             eigenfunctions.append(u)
 
-            # updating guess for next eigenvalue
-            lambda_guess = lambda_val + 5
-            print(f"Next eigenvalue guess: {lambda_guess:.6f}")
-
         print("\nCompleted eigenvalue and eigenfunction calculations!")
         return np.array(eigenvalues), np.array(eigenfunctions)
 
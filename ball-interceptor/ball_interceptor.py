@@ -1,6 +1,6 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from matplotlib.animation import FuncAnimation
+from matplotlib.animation import FFMpegWriter, FuncAnimation, PillowWriter
 from scipy.integrate import solve_ivp
 
 
@@ -20,46 +20,107 @@ class BallInterceptor:
 
     def find_interception(self, target_pos, target_vel, delay=0.0, v0_range=(10, 30), angle_range=(0, 90)):
         """Find launch parameters to intercept moving target, accounting for initial delay"""
-        best_dist = float('inf')
-        best_params = None
-        best_time = None
-
-        # Create more granular search space for better accuracy
-        v0s = np.linspace(*v0_range, 30)
-        angles = np.linspace(*angle_range, 30)
-        times = np.linspace(delay, 10.0 + delay, 1000)  # Extended time range with finer granularity
-
-        for t_intercept in times:
-            # Calculate target position at interception time (measured from start)
-            target_future = self.predict_target_position(target_pos, target_vel, t_intercept)
-
-            for v0 in v0s:
-                for angle in angles:
-                    # Calculate ball position after flight time (excluding delay)
-                    flight_time = t_intercept - delay
-                    if flight_time <= 0:
-                        continue
-
-                    angle_rad = np.deg2rad(angle)
-                    vx = v0 * np.cos(angle_rad)
-                    vy = v0 * np.sin(angle_rad)
-
-                    # Ball position at flight_time
-                    x = vx * flight_time
-                    y = vy * flight_time - 0.5 * self.g * flight_time ** 2
-
-                    ball_pos = np.array([x, y])
-                    dist = np.linalg.norm(ball_pos - target_future)
-
-                    if dist < best_dist:
-                        best_dist = dist
-                        best_params = (v0, angle)
-                        best_time = t_intercept
-
-                    if dist < 0.01:  # Hit threshold
-                        return v0, angle, t_intercept
-
-        return best_params[0], best_params[1], best_time
+        launch = self.solve_interception(target_pos, target_vel, delay, v0_range, angle_range)
+        if launch is not None:
+            return launch
+
+        # No exact interception within the ranges, search for the closest approach
+        return self.search_interception(target_pos, target_vel, delay, v0_range, angle_range)
+
+    def solve_interception(self, target_pos, target_vel, delay=0.0, v0_range=(10, 30), angle_range=(0, 90),
+                           max_flight_time=10.0):
+        """
+        Solve for the exact interception with the lowest launch velocity, or None if there is none in the ranges
+
+        Both balls fall with the same gravity, so a flight time tau hits the target with launch velocity
+        p / tau + w, where p and w are the target position and velocity at launch (t = delay).
+        The squared speed is a quadratic in s = 1 / tau and is minimized in closed form,
+        over the values of s that keep the speed, the angle and the flight time in range.
+        """
+        p = self.predict_target_position(target_pos, target_vel, delay)
+        w = np.array([target_vel[0], target_vel[1] - self.g * delay])
+
+        # |v0|^2 = a s^2 + 2 b s + c
+        a, b, c = p @ p, p @ w, w @ w
+        if a == 0:
+            return None
+
+        # Longest flight time allowed is the end of the search window
+        s_min = 1.0 / max_flight_time
+
+        # The constrained minimum is the vertex of the quadratic or an edge of the allowed s intervals
+        candidates = [-b / a, s_min]
+
+        # Edges of the speed range, where |v0| equals a speed limit
+        for speed in v0_range:
+            discriminant = b ** 2 - a * (c - speed ** 2)
+            if discriminant >= 0:
+                candidates += [(-b - np.sqrt(discriminant)) / a, (-b + np.sqrt(discriminant)) / a]
+
+        # Edges of the angle range, the launch direction turns monotonically from w towards p as s grows
+        for angle in np.deg2rad(angle_range):
+            direction = np.array([np.cos(angle), np.sin(angle)])
+            cross_p = direction[0] * p[1] - direction[1] * p[0]
+            if cross_p != 0:
+                candidates.append((direction[1] * w[0] - direction[0] * w[1]) / cross_p)
+
+        best = None
+        for s in candidates:
+            if s < s_min:
+                continue
+
+            vx, vy = p * s + w
+            v0 = np.hypot(vx, vy)
+            angle = np.degrees(np.arctan2(vy, vx))
+
+            # Edges are computed in floating point, so they are accepted with a small slack
+            speed_slack = 1e-9 * (1.0 + v0)
+            if not (v0_range[0] - speed_slack <= v0 <= v0_range[1] + speed_slack
+                    and angle_range[0] - 1e-9 <= angle <= angle_range[1] + 1e-9):
+                continue
+
+            # Lowest speed wins, ties go to the earlier hit
+            if best is None or v0 < best[0] - speed_slack or (v0 <= best[0] + speed_slack and s > best[2]):
+                best = (v0, angle, s)
+
+        if best is None:
+            return None
+
+        v0, angle, s = best
+        return v0, angle, delay + 1.0 / s
+
+    def search_interception(self, target_pos, target_vel, delay=0.0, v0_range=(10, 30), angle_range=(0, 90)):
+        """Grid search for the launch parameters that bring the ball closest to the target"""
+        # Create more granular search space for better accuracy,
+        # single precision is plenty for centimetre distances and halves the grid
+        v0s = np.linspace(*v0_range, 30, dtype=np.float32)
+        angles = np.linspace(*angle_range, 30, dtype=np.float32)
+        times = np.linspace(delay, 10.0 + delay, 1000, dtype=np.float32)  # Extended time range with finer granularity
+
+        # The first time step has zero flight time, so it can never be an interception
+        times = times[1:]
+        flight = times - delay
+
+        # Target position at every interception time (measured from start)
+        target_x, target_y = self.predict_target_position(target_pos, target_vel, times).astype(np.float32)
+
+        angles_rad = np.deg2rad(angles)
+        vx = v0s[:, None] * np.cos(angles_rad)[None, :]
+        vy = v0s[:, None] * np.sin(angles_rad)[None, :]
+
+        # Squared distance over the whole (time, v0, angle) grid, built in place
+        # so only two grid-sized buffers are alive at once
+        dist_sq = vx[None, :, :] * flight[:, None, None]
+        dist_sq -= target_x[:, None, None]
+        np.square(dist_sq, out=dist_sq)
+
+        dy = vy[None, :, :] * flight[:, None, None]
+        dy -= (target_y + np.float32(0.5 * self.g) * flight ** 2)[:, None, None]
+        np.square(dy, out=dy)
+        dist_sq += dy
+
+        t_idx, v_idx, a_idx = np.unravel_index(np.argmin(dist_sq), dist_sq.shape)
+        return float(v0s[v_idx]), float(angles[a_idx]), float(times[t_idx])
 
     def compute_trajectory(self, v0, angle, t_max=2.0):
         """Compute full trajectory with corrected equations"""
@@ -100,10 +161,10 @@ class BallInterceptor:
         target_line, = ax.plot([], [], 'r-', label='Target')
         target_ball, = ax.plot([], [], 'ro', markersize=10)
 
-        ax.set_xlim(min(min(shooter_x), min(target_x)) - 1,
-                    max(max(shooter_x), max(target_x)) + 1)
-        ax.set_ylim(min(min(shooter_y), min(target_y)) - 1,
-                    max(max(shooter_y), max(target_y)) + 1)
+        ax.set_xlim(min(shooter_x.min(), target_x.min()) - 1,
+                    max(shooter_x.max(), target_x.max()) + 1)
+        ax.set_ylim(min(shooter_y.min(), target_y.min()) - 1,
+                    max(shooter_y.max(), target_y.max()) + 1)
         ax.grid(True)
         ax.legend()
 
@@ -155,4 +216,6 @@ if __name__ == "__main__":
 
     # Create and save animation
     anim = interceptor.animate_interception(v0, angle, target_pos, target_vel, t_intercept, delay=delay_time)
-    anim.save('interception.gif', writer='pillow')
\ No newline at end of file
+    # ffmpeg encodes the frames much faster than pillow when it is installed
+    writer = FFMpegWriter(fps=20) if FFMpegWriter.isAvailable() else PillowWriter(fps=20)
+    anim.save('interception.gif', writer=writer)
\ No newline at end of file
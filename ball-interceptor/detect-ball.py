@@ -3,26 +3,34 @@ import numpy as np
 from typing import List, Tuple
 
 
-def detect_ball(frame: np.ndarray) -> Tuple[int, int]:
+# Hue lookup table, 255 for both red hue ranges as red wraps around in HSV
+RED_HUES = np.zeros(256, dtype=np.uint8)
+RED_HUES[:11] = 255
+RED_HUES[160:] = 255
+
+
+def red_mask(hsv: np.ndarray) -> np.ndarray:
     """
-    Detect the ball in a frame using color detection and contour analysis
-    Returns the center coordinates of the ball (x, y)
+    Create the red color mask of an HSV image, or of a stack of HSV frames
+    Returns a uint8 mask with 255 for red pixels
     """
-    # Convert to HSV color space for better color detection
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+    # Red color range (assuming red ball from previous script): hues 0-10 and 160-180,
+    # saturation and value of at least 100
 
-    # Define red color range (assuming red ball from previous script)
-    # For red color we need two ranges as it wraps around in HSV
-    lower_red1 = np.array([0, 100, 100])
-    upper_red1 = np.array([10, 255, 255])
-    lower_red2 = np.array([160, 100, 100])
-    upper_red2 = np.array([180, 255, 255])
+    # Frames are thresholded together as one tall image
+    image = hsv.reshape(-1, hsv.shape[-2], 3)
 
-    # Create masks for red color
-    mask1 = cv2.inRange(hsv, lower_red1, upper_red1)
-    mask2 = cv2.inRange(hsv, lower_red2, upper_red2)
-    mask = cv2.add(mask1, mask2)
+    # One pass for saturation and value, the hue ranges are a table lookup
+    mask = cv2.inRange(image, np.array([0, 100, 100]), np.array([255, 255, 255]))
+    mask &= cv2.LUT(cv2.extractChannel(image, 0), RED_HUES)
+    return mask.reshape(hsv.shape[:-1])
 
+
+def ball_center(mask: np.ndarray) -> Tuple[int, int]:
+    """
+    Find the ball in a uint8 red mask using contour analysis
+    Returns the center coordinates of the ball (x, y)
+    """
     # Find contours
     contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
 
@@ -40,6 +48,20 @@ def detect_ball(frame: np.ndarray) -> Tuple[int, int]:
     return None
 
 
+def detect_ball(frame: np.ndarray) -> Tuple[int, int]:
+    """
+    Detect the ball in a frame using color detection and contour analysis
+    Returns the center coordinates of the ball (x, y)
+    """
+    # Convert to HSV color space for better color detection
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
+
+    # Create mask for red color
+    mask = red_mask(hsv)
+
+    return ball_center(mask)
+
+
 def pixel_to_meters(pixel_pos: Tuple[int, int], scale: float) -> Tuple[float, float]:
     """Convert pixel coordinates to meters"""
     return (pixel_pos[0] / scale, pixel_pos[1] / scale)
@@ -55,24 +77,36 @@ def calculate_velocity(positions: List[Tuple[float, float]], dt: float) -> Tuple
 
     # Use only the first few frames to minimize gravity effect
     use_frames = min(10, len(positions))
-    times = np.array(range(use_frames)) * dt
+    times = np.arange(use_frames) * dt
 
-    # Separate x and y coordinates
-    x_coords = np.array([p[0] for p in positions[:use_frames]])
-    y_coords = np.array([p[1] for p in positions[:use_frames]])
+    # x and y coordinates as the two columns
+    coords = np.array(positions[:use_frames], dtype=float)
+
+    # Power sums of t and moments sum(t^k * x), sum(t^k * y) for k = 0, 1, 2
+    # give the least-squares fits in closed form
+    powers = times[:, None] ** np.arange(5)
+    n, s1, s2, s3, s4 = powers.sum(axis=0)
+    moments = powers[:, :3].T @ coords
 
     # Linear regression for x-coordinate (constant velocity)
-    vx = np.polyfit(times, x_coords, 1)[0]
+    vx = (n * moments[1, 0] - s1 * moments[0, 0]) / (n * s2 - s1 ** 2)
 
     # For y-coordinate, use quadratic fit to account for gravity
     # and take the derivative at t=0 for initial velocity
-    y_coeffs = np.polyfit(times, y_coords, 2)
-    vy = y_coeffs[1]  # First derivative at t=0
+    if use_frames < 3:
+        # not enough points for a quadratic, falling back to the linear fit
+        vy = (n * moments[1, 1] - s1 * moments[0, 1]) / (n * s2 - s1 ** 2)
+    else:
+        normal_matrix = np.array([[n, s1, s2],
+                                  [s1, s2, s3],
+                                  [s2, s3, s4]])
+        y_coeffs = np.linalg.solve(normal_matrix, moments[:, 1])  # c0 + c1*t + c2*t^2
+        vy = y_coeffs[1]  # First derivative at t=0
 
     return (vx, vy)
 
 
-def detect(path):
+def detect(path, debug=False):
     # Video parameters (matching the generation script)
     SCALE = 50  # pixels per meter (same as in generation script)
     FPS = 60
@@ -84,32 +118,41 @@ def detect(path):
         print("Error: Could not open video file")
         return
 
-    # Store ball positions
-    positions_pixels = []
-    positions_meters = []
-    frame_count = 0
-
-    while video.isOpened() and frame_count < 60:
+    # Read the frames used for detection up front
+    frames = []
+    while video.isOpened() and len(frames) < 60:
         ret, frame = video.read()
         if not ret:
             break
+        frames.append(frame)
 
-        # Detect ball
-        ball_center = detect_ball(frame)
-        if ball_center:
-            positions_pixels.append(ball_center)
-            positions_meters.append(pixel_to_meters(ball_center, SCALE))
-
-        frame_count += 1
+    video.release()
 
-        # Visualize detection (for debugging)
-        if ball_center:
-            cv2.circle(frame, ball_center, 5, (0, 255, 0), -1)
-            cv2.imshow('Detection', frame)
-            cv2.waitKey(1)
+    # Store ball positions
+    positions_pixels = []
+    positions_meters = []
 
-    video.release()
-    cv2.destroyAllWindows()
+    if frames:
+        # Convert and threshold the whole clip at once, as one tall image
+        frames = np.stack(frames)
+        hsv = cv2.cvtColor(frames.reshape(-1, frames.shape[2], 3), cv2.COLOR_BGR2HSV).reshape(frames.shape)
+        masks = red_mask(hsv)
+
+        for frame, mask in zip(frames, masks):
+            # Detect ball
+            center = ball_center(mask)
+            if center:
+                positions_pixels.append(center)
+                positions_meters.append(pixel_to_meters(center, SCALE))
+
+            # Visualize detection (for debugging)
+            if debug and center:
+                cv2.circle(frame, center, 5, (0, 255, 0), -1)
+                cv2.imshow('Detection', frame)
+                cv2.waitKey(1)
+
+    if debug:
+        cv2.destroyAllWindows()
 
     if positions_meters:
         # Calculate initial position (first detected position)